@@ -3,16 +3,38 @@
 YFinance FastMCP Server - Using the newer FastMCP approach
 """
 
-import json
-import pandas as pd
+import asyncio
+from threading import Lock
+import orjson
 import yfinance as yf
+from curl_cffi import requests as curl_requests
 from fastmcp import FastMCP
 
 # Create FastMCP server
 mcp = FastMCP("YFinance Server")
 
+# Shared HTTP session reused across downloads
+_SESSION = curl_requests.Session(impersonate="chrome")
+
+# yf.download keeps per-call results in module-level state (yfinance.shared),
+# so concurrent downloads are serialized; the lock is held inside the worker
+# thread so a cancelled request cannot release it early
+_YF_LOCK = Lock()
+
+def _locked_download(**kwargs):
+    """Run yf.download while holding the process-wide yfinance lock"""
+    with _YF_LOCK:
+        return yf.download(**kwargs)
+
+def _dumps(obj) -> str:
+    """Serialize a response with orjson (numpy scalars and NaN handled natively)"""
+    return orjson.dumps(
+        obj,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
 @mcp.tool()
-def download_stock_data(
+async def download_stock_data(
     tickers: str,
     period: str = "1y",
     interval: str = "1d",
@@ -69,11 +91,11 @@ def download_stock_data(
         else:
             download_args["period"] = period
         
-        # Download data
-        data = yf.download(**download_args)
+        # Download data in a worker thread so the event loop stays free
+        data = await asyncio.to_thread(_locked_download, session=_SESSION, **download_args)
         
         if data is None or data.empty:
-            return json.dumps({"error": f"No data found for ticker(s): {tickers}"})
+            return _dumps({"error": f"No data found for ticker(s): {tickers}"})
         
         # Convert to simple format
         result = {
@@ -86,35 +108,34 @@ def download_stock_data(
         }
         
         # Convert to records
-        for date, row in data.iterrows():
-            record = {"date": str(date)}
-            for col in data.columns:
-                val = row[col]
-                record[str(col)] = float(val) if pd.notna(val) else None
-            result["data"].append(record)
+        records = data.set_axis([str(col) for col in data.columns], axis=1).astype("float64")
+        records.insert(0, "date", [str(ts) for ts in data.index])
+        result["data"] = records.to_dict(orient="records")
         
         # Add summary
         if len(data) > 0:
             numeric_cols = data.select_dtypes(include=['number']).columns
             if len(numeric_cols) > 0:
                 first_col = numeric_cols[0]
+                series = data[first_col].astype("float64")
+                stats = series.agg(["min", "max", "mean"])
                 result["summary"] = {
                     "start_date": str(data.index[0]),
                     "end_date": str(data.index[-1]),
                     "total_records": len(data),
                     "first_column_stats": {
                         "column": str(first_col),
-                        "min": float(data[first_col].min()),
-                        "max": float(data[first_col].max()),
-                        "mean": float(data[first_col].mean()),
-                        "last_value": float(data[first_col].iloc[-1]) if pd.notna(data[first_col].iloc[-1]) else None
+                        "min": stats["min"],
+                        "max": stats["max"],
+                        "mean": stats["mean"],
+                        "last_value": series.iat[-1]
                     }
                 }
         
-        return json.dumps(result, indent=2)
+        return _dumps(result)
         
     except Exception as e:
-        return json.dumps({"error": f"Error downloading stock data: {str(e)}"})
+        return _dumps({"error": f"Error downloading stock data: {str(e)}"})
 
 if __name__ == "__main__":
     mcp.run()